@@ -9,6 +9,10 @@ import healpy as hp
 import numpy as np
 import datetime
 import argparse
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pys2let
 import pyssht
 
@@ -18,167 +22,235 @@ from pxmcmc.prior import S2_Wavelets_L1, L1
 from pxmcmc.saving import save_mcmc
 from pxmcmc.utils import calc_pixel_areas
 
-parser = argparse.ArgumentParser()
-parser.add_argument(
-    "--infile",
-    type=str,
-    default="ETOPO1_Ice_hpx_256.fits",
-    help="Path to input datafile.",
-)
-parser.add_argument(
-    "--outdir", type=str, default=".", help="Output directory. Default '.'."
-)
-parser.add_argument(
-    "--jobid",
-    type=str,
-    default="0",
-    help="Optional ID that will be added to the end of the output filename. Default '0'.",
-)
-parser.add_argument(
-    "--algo",
-    type=str,
-    default="myula",
-    help="PxMCMC algorithm to be used. One of ['myula', 'pxmala', 'skrock']. Default 'myula'.",
-)
-parser.add_argument(
-    "--setting",
-    type=str,
-    default="synthesis",
-    help="'synthesis' or 'analysis'. Default 'myula'.",
-)
-parser.add_argument(
-    "--delta", type=float, default=1e-6, help="PxMCMC step size. Default 1e-6"
-)
-parser.add_argument(
-    "--mu",
-    type=float,
-    default=1,
-    help="Regularisation parameter (prior width). Default 1.",
-)
-parser.add_argument("--L", type=int, default=32, help="Angular bandlimit. Default 32.")
-parser.add_argument("--makenoise", action="store_true", help="Add noise to data.")
-parser.add_argument(
-    "--sigma", type=float, default=1, help="Noise level to be added to data."
-)
-parser.add_argument(
-    "--scaleafrica",
-    type=int,
-    default=0,
-    help="Factor by which to increase the noise level in Africa.",
-)
-args = parser.parse_args()
-
-# Set up wavelet parameters
-L = args.L
-B = 1.5
-J_min = 2
-sigma = args.sigma
-setting = args.setting
-
-# Read input data
-if "_hpx_" in args.infile:
-    topo = hp.read_map(args.infile, verbose=False)
-    topo_d_lm = hp.map2alm(topo, L - 1)
-    topo_d = pys2let.alm2map_mw(pys2let.lm_hp2lm(topo_d_lm, L), L, 0)
-elif "_mw_" in args.infile:
-    topo = np.load(args.infile)
-    topo_d = topo.reshape((L, 2 * L - 1))
-else:
-    raise ValueError("Check filename")
-
-if args.makenoise:  # Adding noise to data, as noise would be present in real data
-    np.random.seed(2)
-    areas = calc_pixel_areas(L)
-    sig_d = np.sqrt(sigma ** 2 / areas)
-    if args.scaleafrica:  # Extra noisy in Africa
-        thetas = np.deg2rad(np.linspace(60, 120, 100))
-        phis = np.deg2rad(np.linspace(-30, 30, 100))
-        block = np.zeros((L, 2 * L - 1))
-        for theta in thetas:
-            theta_ind = pyssht.theta_to_index(theta, L)
-            for phi in phis:
-                phi_ind = pyssht.phi_to_index(phi, L)
-                block[theta_ind, phi_ind] = 1
-        sig_d[block == 1] *= args.scaleafrica
-    sig_d = sig_d.flatten()  # flatten() by default goes to C ordering like in s2let
-    noise = np.random.normal(0, sig_d)
-    topo_d += noise
-    np.random.seed(None)
-else:
-    sig_d = sigma
-    noise = 0
-
-# Set up forward operator (measurement and transform).
-# This makes data predictions for a given MCMC sample, and compares
-# with the observed data.
-# In this case, we're using a simple Identity measurement operator
-# and a spherical wavelet transform.
-# See the definition of SphericalWaveletTransformOperator and the
-# docs for ForwardOperator.
-forwardop = SphericalWaveletTransformOperator(
-    topo_d / 1000, sig_d, setting, L, B, J_min
-)
-
-# Set MCMC tuning parameters
-params = PxMCMCParams(
-    nsamples=int(1e2),  # In practice you would want much more than this
-    nburn=int(0),
-    ngap=int(5e2),
-    delta=args.delta,
-    lmda=1e-6,
-    mu=args.mu,
-    complex=False,
-    verbosity=5e3,
-    s=10,
-)
-
-# Set up the regulariser/prior.
-# This calculates the prior probability of the MCMC sample,
-# and importantly calculates the proximal mapping of the prior
-# to more efficiently navigate the non-smooth parameter space.
-# See the docs of L1.
-regulariser = S2_Wavelets_L1(
-    setting,
-    forwardop.transform.inverse,
-    forwardop.transform.inverse_adjoint,
-    params.lmda * params.mu,
-    L=L,
-    B=B,
-    J_min=J_min,
-)
-
-print(f"Number of data points: {len(topo_d)}")
-print(f"Number of model parameters: {forwardop.nparams}")
-
-# Choose PxMCMC sampler.
-# Three different samplers have been implemented in this pacakge.
-if args.algo == "myula":
-    mcmc = MYULA(forwardop, regulariser, params)
-elif args.algo == "pxmala":
-    mcmc = PxMALA(forwardop, regulariser, params, tune_delta=True)
-elif args.algo == "skrock":
-    mcmc = SKROCK(forwardop, regulariser, params)
-else:
-    raise ValueError
-
-# RUN!
-NOW = datetime.datetime.now()
-mcmc.run()
-
-# Save the results!
-filename = f"{args.algo}_{args.setting}_{NOW.strftime('%d%m%y_%H%M%S')}_{args.jobid}"
-save_mcmc(
-    mcmc,
-    params,
-    args.outdir,
-    filename=filename,
-    L=L,
-    B=B,
-    J_min=J_min,
-    nparams=forwardop.nparams,
-    noise=noise,
-    setting=setting,
-    sigma=sigma,
-    scaleafrica=args.scaleafrica,
-    time=str(datetime.datetime.now() - NOW),
-)
+
+def read_data(args):
+    """
+    Reads the topography image and optionally adds noise to it.
+    The noise is seeded so that every chain sees the same data.
+    """
+    L = args.L
+    sigma = args.sigma
+    if "_hpx_" in args.infile:
+        topo = hp.read_map(args.infile, verbose=False)
+        topo_d_lm = hp.map2alm(topo, L - 1)
+        topo_d = pys2let.alm2map_mw(pys2let.lm_hp2lm(topo_d_lm, L), L, 0)
+    elif "_mw_" in args.infile:
+        topo = np.load(args.infile)
+        topo_d = topo.reshape((L, 2 * L - 1))
+    else:
+        raise ValueError("Check filename")
+
+    if args.makenoise:  # Adding noise to data, as noise would be present in real data
+        np.random.seed(2)
+        areas = calc_pixel_areas(L)
+        sig_d = np.sqrt(sigma ** 2 / areas)
+        if args.scaleafrica:  # Extra noisy in Africa
+            thetas = np.deg2rad(np.linspace(60, 120, 100))
+            phis = np.deg2rad(np.linspace(-30, 30, 100))
+            block = np.zeros((L, 2 * L - 1))
+            for theta in thetas:
+                theta_ind = pyssht.theta_to_index(theta, L)
+                for phi in phis:
+                    phi_ind = pyssht.phi_to_index(phi, L)
+                    block[theta_ind, phi_ind] = 1
+            sig_d[block == 1] *= args.scaleafrica
+        sig_d = sig_d.flatten()  # flatten() by default goes to C ordering like in s2let
+        noise = np.random.normal(0, sig_d)
+        topo_d += noise
+        np.random.seed(None)
+    else:
+        sig_d = sigma
+        noise = 0
+    return topo_d, sig_d, noise
+
+
+def run_chain(args, topo_d, sig_d, noise, seed, chain_id):
+    """
+    Sets up and runs a single independent MCMC chain on the data from
+    :code:`read_data`, then saves it.
+    Chains share no state, so several can be run in parallel processes.
+    """
+    if args.nchains > 1:
+        # Parallelism comes from the chains, so keep each worker to one
+        # thread rather than letting numba's thread pool oversubscribe the cores.
+        try:
+            import numba
+
+            numba.set_num_threads(1)
+        except ImportError:
+            pass
+
+    # Set up wavelet parameters
+    L = args.L
+    B = 1.5
+    J_min = 2
+    sigma = args.sigma
+    setting = args.setting
+
+    np.random.seed(seed)
+
+    # Set up forward operator (measurement and transform).
+    # This makes data predictions for a given MCMC sample, and compares
+    # with the observed data.
+    # In this case, we're using a simple Identity measurement operator
+    # and a spherical wavelet transform.
+    # See the definition of SphericalWaveletTransformOperator and the
+    # docs for ForwardOperator.
+    forwardop = SphericalWaveletTransformOperator(
+        topo_d / 1000, sig_d, setting, L, B, J_min
+    )
+
+    # Set MCMC tuning parameters
+    params = PxMCMCParams(
+        nsamples=int(1e2),  # In practice you would want much more than this
+        nburn=int(0),
+        ngap=int(5e2),
+        delta=args.delta,
+        lmda=1e-6,
+        mu=args.mu,
+        complex=False,
+        verbosity=5e3,
+        s=10,
+    )
+
+    # Set up the regulariser/prior.
+    # This calculates the prior probability of the MCMC sample,
+    # and importantly calculates the proximal mapping of the prior
+    # to more efficiently navigate the non-smooth parameter space.
+    # See the docs of L1.
+    regulariser = S2_Wavelets_L1(
+        setting,
+        forwardop.transform.inverse,
+        forwardop.transform.inverse_adjoint,
+        params.lmda * params.mu,
+        L=L,
+        B=B,
+        J_min=J_min,
+    )
+
+    print(f"Number of data points: {len(topo_d)}")
+    print(f"Number of model parameters: {forwardop.nparams}")
+
+    # Choose PxMCMC sampler.
+    # Three different samplers have been implemented in this pacakge.
+    if args.algo == "myula":
+        mcmc = MYULA(forwardop, regulariser, params)
+    elif args.algo == "pxmala":
+        mcmc = PxMALA(forwardop, regulariser, params, tune_delta=True)
+    elif args.algo == "skrock":
+        mcmc = SKROCK(forwardop, regulariser, params)
+    else:
+        raise ValueError
+
+    # RUN!
+    NOW = datetime.datetime.now()
+    mcmc.run()
+
+    # Save the results!
+    filename = f"{args.algo}_{args.setting}_{NOW.strftime('%d%m%y_%H%M%S')}_{args.jobid}"
+    if args.nchains > 1:
+        filename += f"_chain{chain_id}"
+    save_mcmc(
+        mcmc,
+        params,
+        args.outdir,
+        filename=filename,
+        L=L,
+        B=B,
+        J_min=J_min,
+        nparams=forwardop.nparams,
+        noise=noise,
+        setting=setting,
+        sigma=sigma,
+        scaleafrica=args.scaleafrica,
+        seed=seed,
+        time=str(datetime.datetime.now() - NOW),
+    )
+    return filename
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--infile",
+        type=str,
+        default="ETOPO1_Ice_hpx_256.fits",
+        help="Path to input datafile.",
+    )
+    parser.add_argument(
+        "--outdir", type=str, default=".", help="Output directory. Default '.'."
+    )
+    parser.add_argument(
+        "--jobid",
+        type=str,
+        default="0",
+        help="Optional ID that will be added to the end of the output filename. Default '0'.",
+    )
+    parser.add_argument(
+        "--algo",
+        type=str,
+        default="myula",
+        help="PxMCMC algorithm to be used. One of ['myula', 'pxmala', 'skrock']. Default 'myula'.",
+    )
+    parser.add_argument(
+        "--setting",
+        type=str,
+        default="synthesis",
+        help="'synthesis' or 'analysis'. Default 'myula'.",
+    )
+    parser.add_argument(
+        "--delta", type=float, default=1e-6, help="PxMCMC step size. Default 1e-6"
+    )
+    parser.add_argument(
+        "--mu",
+        type=float,
+        default=1,
+        help="Regularisation parameter (prior width). Default 1.",
+    )
+    parser.add_argument("--L", type=int, default=32, help="Angular bandlimit. Default 32.")
+    parser.add_argument("--makenoise", action="store_true", help="Add noise to data.")
+    parser.add_argument(
+        "--sigma", type=float, default=1, help="Noise level to be added to data."
+    )
+    parser.add_argument(
+        "--scaleafrica",
+        type=int,
+        default=0,
+        help="Factor by which to increase the noise level in Africa.",
+    )
+    parser.add_argument(
+        "--nchains",
+        type=int,
+        default=1,
+        help="Number of independent chains to run in parallel processes. Default 1.",
+    )
+    args = parser.parse_args()
+    if args.nchains < 1:
+        parser.error("--nchains must be at least 1")
+
+    # Read the data once and share it with all the chains
+    topo_d, sig_d, noise = read_data(args)
+
+    # Each chain gets its own seed so that chains run in separate processes
+    # do not share the random state inherited from this one.
+    seeds = np.random.SeedSequence().generate_state(args.nchains)
+    if args.nchains == 1:
+        run_chain(args, topo_d, sig_d, noise, seeds[0], 0)
+    else:
+        nworkers = min(args.nchains, os.cpu_count())
+        # One OpenMP/BLAS thread per chain.  The workers are spawned rather than
+        # forked so that they import numpy afresh and pick up the limit.
+        os.environ.setdefault("OMP_NUM_THREADS", "1")
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=nworkers, mp_context=spawn) as pool:
+            chains = pool.map(
+                run_chain,
+                repeat(args),
+                repeat(topo_d),
+                repeat(sig_d),
+                repeat(noise),
+                seeds,
+                range(args.nchains),
+            )
+            for filename in chains:
+                print(f"Saved {filename}")
@@ -6,6 +6,7 @@ https://doi.org/10.1093/rasti/rzac010
 """
 
 import numpy as np
+import pyssht
 import argparse
 from os import path
 from scipy import sparse
@@ -25,38 +26,55 @@ def read_datafile(datafile):
     Expects a file with the following columns for each path:
     start_lat, start_lon, stop_lat, stop_lon, data, error, minor/majorm, n_similar
     Coordinates given in degrees
+    Each column is returned as a separate 1D array.
     """
     start_lat, start_lon, stop_lat, stop_lon, data, sig_d, mima, nsim = np.loadtxt(
         datafile, unpack=True
     )
-    start = np.stack([start_lat, start_lon], axis=1)
-    stop = np.stack([stop_lat, stop_lon], axis=1)
     if np.any(sig_d < 0):
         warn("Some of the data errors read in are negative. Forcing positivity.")
         sig_d = np.abs(sig_d)
-    return start, stop, data, sig_d, mima, nsim
+    return start_lat, start_lon, stop_lat, stop_lon, data, sig_d, mima, nsim
 
 
-def build_path(start, stop, L):
+def build_path(start_lat, start_lon, stop_lat, stop_lon, L):
     """
     Find all the MW pixels a great circle passes through.
+    Returns the indices of those pixels and the path weights in them,
+    rather than the full (mostly empty) map.
     """
-    path = GreatCirclePath(start, stop, "MW", L=L, weighting="average", latlon=True)
+    path = GreatCirclePath(
+        (start_lat, start_lon),
+        (stop_lat, stop_lon),
+        "MW",
+        L=L,
+        weighting="average",
+        latlon=True,
+    )
     path.get_points(points_per_rad=160)
     path.fill()
-    return path.map
+    pixels = np.flatnonzero(path.map)
+    return pixels, path.map[pixels]
 
 
-def get_path_matrix(start, stop, L=32, processes=16):
+def get_path_matrix(start_lat, start_lon, stop_lat, stop_lon, L=32, processes=16):
     """
     Build a matrix of all the great cricle paths.
     This is effectively the measurement operator matrix.
     """
-    itrbl = [(stt, stp, L) for (stt, stp) in zip(start, stop)]
+    itrbl = [
+        (*endpoints, L)
+        for endpoints in zip(start_lat, start_lon, stop_lat, stop_lon)
+    ]
+    chunksize = max(1, len(itrbl) // (processes * 4))
     with Pool(processes) as p:
-        result = p.starmap_async(build_path, itrbl)
-        paths = result.get()
-    return sparse.csr_matrix(paths)
+        paths = p.starmap(build_path, itrbl, chunksize=chunksize)
+    pixels, weights = zip(*paths)
+    rows = np.repeat(np.arange(len(paths)), [len(pix) for pix in pixels])
+    return sparse.csr_matrix(
+        (np.concatenate(weights), (rows, np.concatenate(pixels))),
+        shape=(len(paths), pyssht.sample_length(L, Method="MW")),
+    )
 
 
 if __name__ == "__main__":
@@ -126,12 +144,14 @@ if __name__ == "__main__":
     setting = args.setting
 
     # Read data and path matrix
-    start, stop, data, sig_d, _, nsim = read_datafile(args.infile)
+    start_lat, start_lon, stop_lat, stop_lon, data, sig_d, _, nsim = read_datafile(
+        args.infile
+    )
     if path.exists(args.pathsfile):
         path_matrix = sparse.load_npz(args.pathsfile)
     else:
-        path_matrix = get_path_matrix(start, stop, L)
-        sparse.save_npz(args.pathsfile, path_matrix)
+        path_matrix = get_path_matrix(start_lat, start_lon, stop_lat, stop_lon, L)
+        sparse.save_npz(args.pathsfile, path_matrix, compressed=False)
 
     assert path_matrix.shape[0] == len(data)
 
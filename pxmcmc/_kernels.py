@@ -0,0 +1,62 @@
+"""
+Compiled kernels for the elementwise operations on the MCMC hot path.
+Requires `numba <https://numba.pydata.org/>`_, which is an optional dependency.
+Callers should fall back to the pure :code:`numpy` implementation if this module cannot be imported.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+# No fastmath: it would let NaNs be thresholded to 0 and hide a diverging chain.
+# The kernels follow the NumPy paths in utils operation for operation,
+# so results do not depend on whether numba is installed.
+
+
+@njit(parallel=True, cache=True)
+def soft_real(X, T, out):
+    """
+    Soft thresholding of a real vector in a single pass.  Writes :code:`sign(X) * max(|X| - T, 0)` into :code:`out`.  NaNs propagate.
+
+    :meta private:
+    """
+    for i in prange(X.size):
+        shrunk = abs(X[i]) - T[i]
+        if shrunk < 0.0:
+            shrunk = 0.0
+        out[i] = np.sign(X[i]) * shrunk
+
+
+@njit(parallel=True, cache=True)
+def soft_complex(X, absX, T, out):
+    """
+    Soft thresholding of a complex vector in a single pass.  Writes :code:`X/|X| * max(|X| - T, 0)` into :code:`out`.  NaNs propagate.
+    :code:`absX` must be :code:`np.abs(X)`, which rounds differently to numba's complex :code:`abs`.
+
+    :meta private:
+    """
+    for i in prange(X.size):
+        absx = absX[i]
+        shrunk = absx - T[i]
+        if shrunk < 0.0:
+            shrunk = 0.0
+        if absx != 0.0:
+            # same rounding as NumPy's complex-by-real division
+            scale = 1.0 / absx
+            out[i] = complex(X[i].real * scale * shrunk, X[i].imag * scale * shrunk)
+        else:
+            out[i] = 0.0
+
+
+@njit(parallel=True, cache=True)
+def clenshaw(c, X, out):
+    """
+    Evaluates the Chebyshev series with coefficients :code:`c` at each point of the real vector :code:`X` using Clenshaw's recurrence, writing into :code:`out`.
+
+    :meta private:
+    """
+    for i in prange(X.size):
+        b1 = 0.0
+        b2 = 0.0
+        for k in range(c.size - 1, 0, -1):
+            b1, b2 = 2.0 * X[i] * b1 - b2 + c[k], b1
+        out[i] = c[0] + X[i] * b1 - b2
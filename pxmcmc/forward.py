@@ -64,9 +64,7 @@ class ForwardOperator:
         return self.measurement.forward(self.transform.inverse(X))
 
     def _gradg_analysis(self, preds):
-        return self.measurement.adjoint(
-            (self.invcov @ sparse.csr_matrix(preds - self.data).T).toarray().flatten()
-        )
+        return self.measurement.adjoint(self.invcov @ (preds - self.data))
 
     def _gradg_synthesis(self, preds):
         return self.transform.inverse_adjoint(self._gradg_analysis(preds))
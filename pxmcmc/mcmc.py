@@ -1,6 +1,6 @@
 import numpy as np
 from scipy.stats import laplace
-from pxmcmc.utils import chebyshev1, cheb1der
+from pxmcmc.utils import chebyshev1, chebyshev1_all, cheb1der
 
 
 class PxMCMCParams:
@@ -15,6 +15,7 @@ class PxMCMCParams:
     :param nburn: burn-in size
     :param ngap: Thinning parameter=number of iterations between saved samples
     :param complex: :code:`True` if sampled parameters are complex. Default :code:`False`.
+    :param single_precision: :code:`True` to store the saved samples and predictions in single precision, halving their memory.  Sampling itself is always done in double precision. Default :code:`False`.
     :param verbosity: print every :code:`verbosity` samples to console
     :param track: list of variables to keep track of
     """
@@ -28,6 +29,7 @@ class PxMCMCParams:
         nburn=int(1e3),
         ngap=int(1e2),
         complex=False,
+        single_precision=False,
         verbosity=100,
         track=["logposterior", "L2", "prior", "chain"],
     ):
@@ -39,6 +41,7 @@ class PxMCMCParams:
         self.nburn = nburn
         self.ngap = ngap
         self.complex = complex
+        self.single_precision = single_precision
         self.verbosity = verbosity
         self.track = track
 
@@ -113,14 +116,16 @@ class PxMCMC:
     def _initialise_tracking_arrays(self):
         if "logposterior" in self.track:
             self.logPi = np.zeros(self.nsamples)
+        real_dtype = np.float32 if self.single_precision else float
+        complex_dtype = np.complex64 if self.single_precision else complex
         if "predictions" in self.track:
             self.preds = np.zeros(
-                (self.nsamples, len(self.forward.data)), dtype=float
+                (self.nsamples, len(self.forward.data)), dtype=real_dtype
             )
         if "chain" in self.track:
             self.chain = np.zeros(
                 (self.nsamples, self.forward.nparams),
-                dtype=complex if self.complex else float,
+                dtype=complex_dtype if self.complex else real_dtype,
             )
         if "L2" in self.track:
             self.L2s = np.zeros(self.nsamples, dtype=float)
@@ -349,23 +354,23 @@ class SKROCK(PxMCMC):
     def _K_recursion(self, X, s, Z):
         if s == 0:
             return X
-        elif s == 1:
-            return (
-                X
-                + self.mus[1]
-                * self.delta
-                * self._gradlogpi(X + self.nus[1] * np.sqrt(2 * self.delta) * Z)
-                + self.ks[1] * np.sqrt(2 * self.delta) * Z
-            )
-        else:
-            return (
-                self.mus[s]
-                * self.delta
-                * self._gradlogpi(self._K_recursion(X, s - 1, Z))
-                + self.nus[s] * self._K_recursion(X, s - 1, Z)
-                + self.ks[s]
-                - self._K_recursion(X, s - 2, Z)
+        K_prev = X
+        K = (
+            X
+            + self.mus[1]
+            * self.delta
+            * self._gradlogpi(X + self.nus[1] * np.sqrt(2 * self.delta) * Z)
+            + self.ks[1] * np.sqrt(2 * self.delta) * Z
+        )
+        for j in range(2, s + 1):
+            K_prev, K = (
+                K,
+                self.mus[j] * self.delta * self._gradlogpi(K)
+                + self.nus[j] * K
+                + self.ks[j]
+                - K_prev,
             )
+        return K
 
     def _recursion_coefs(self):
         self.mus = np.zeros(self.s + 1)
@@ -376,8 +381,10 @@ class SKROCK(PxMCMC):
         self.nus[1] = self.s * self.omega_1 / 2
         self.ks[1] = self.s * self.omega_1 / self.omega_0
 
+        T_omega_0 = chebyshev1_all(self.omega_0, self.s)
+        T_omega_1 = chebyshev1_all(self.omega_1, self.s)
         for j in range(2, self.s + 1):
-            cheb_ratio = chebyshev1(self.omega_0, j - 1) / chebyshev1(self.omega_1, j)
+            cheb_ratio = T_omega_0[j - 1] / T_omega_1[j]
             self.mus[j] = 2 * self.omega_1 * cheb_ratio
             self.nus[j] = 2 * self.omega_0 * cheb_ratio
             self.ks[j] = 1 - self.nus[0]
@@ -42,18 +42,26 @@ class Identity(Measurement):
 
     def __init__(self, ndata, npix):
         super().__init__(ndata, npix)
-        self.eye = sparse.eye(self.ndata, self.npix)
-        self.eye_adj = self.eye.getH()
 
     def forward(self, X):
         """:meta private:"""
         assert len(X) == self.npix
-        return self.eye.dot(X)
+        return self._resize(X, self.ndata)
 
     def adjoint(self, Y):
         """:meta private:"""
         assert len(Y) == self.ndata
-        return self.eye_adj.dot(Y)
+        return self._resize(Y, self.npix)
+
+    @staticmethod
+    def _resize(X, size):
+        """
+        Equivalent to multiplying by a rectangular identity matrix, i.e. truncates or zero-pads :code:`X` to length :code:`size`.
+        """
+        out = np.zeros(size, dtype=np.result_type(X, float))
+        n = min(size, len(X))
+        out[:n] = X[:n]
+        return out
 
 
 class PathIntegral(Measurement):
@@ -63,12 +71,12 @@ class PathIntegral(Measurement):
     .. todo::
        Since this is just a matrix multiplication, can be renamed to something more generic.
 
-    :param path_matrix: :math:`N_{\mathrm{paths}}\\times N_{\mathrm{pix}}` matrix describing a set of paths.
+    :param path_matrix: :math:`N_{\mathrm{paths}}\\times N_{\mathrm{pix}}` matrix describing a set of paths.  Stored in CSR format, as is its adjoint, so that both matrix-vector products are row-wise.
     """
 
     def __init__(self, path_matrix):
-        self.path_matrix = path_matrix
-        self.path_matrix_adj = self.path_matrix.getH()
+        self.path_matrix = sparse.csr_matrix(path_matrix)
+        self.path_matrix_adj = self.path_matrix.getH().tocsr()
 
         self.ndata, self.npix = path_matrix.shape
 
@@ -151,12 +159,10 @@ class WeakLensingHarmonic(Measurement):
     def compute_harmonic_kernel(self):
         """Compuptes harmonic space kernel mapping."""
         k = np.ones(self.L ** 2, dtype=float)
-        index = 4
-        for l in range(2, self.L):
-            for m in range(-l, l + 1):
-                el = float(l)
-                k[index] = -1.0 * np.sqrt(((el + 2.0) * (el - 1.0)) / ((el + 1.0) * el))
-                index += 1
+        # degree l of each coefficient, each repeated for its 2l+1 orders
+        els = np.repeat(np.arange(self.L, dtype=float), 2 * np.arange(self.L) + 1)
+        el = els[4:]
+        k[4:] = -1.0 * np.sqrt(((el + 2.0) * (el - 1.0)) / ((el + 1.0) * el))
         return k
 
     def harmonic_mapping(self, flm):
@@ -196,6 +202,8 @@ class WeakLensing(WeakLensingHarmonic):
             self.mask = np.ones(self.shape, dtype=bool)
         else:
             self.mask = mask.astype(bool)
+        # flat indices of the unmasked pixels, so masking is a plain gather/scatter
+        self._mask_idx = np.flatnonzero(self.mask)
 
         # Define observational covariance
         if ngal is None:
@@ -258,7 +266,7 @@ class WeakLensing(WeakLensingHarmonic):
         if f.shape != self.shape:
             raise ValueError("Signal shape is incorrect for mw-sampling")
 
-        return f[self.mask]
+        return np.take(f, self._mask_idx)
 
     def mask_adjoint(self, x):
         """Applies given mask adjoint to observations
@@ -275,9 +283,9 @@ class WeakLensing(WeakLensingHarmonic):
         if x is not x:
             raise ValueError("Signal is NaN.")
 
-        f = np.zeros(self.shape, dtype=complex)
-        f[self.mask] = x
-        return f
+        f = np.zeros(self.mask.size, dtype=complex)
+        f[self._mask_idx] = x
+        return f.reshape(self.shape)
 
     def ngal_to_inv_cov(self, ngal):
         """Converts galaxy number density map to
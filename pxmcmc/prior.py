@@ -2,7 +2,7 @@ import numpy as np
 import pys2let
 import pyssht
 
-from pxmcmc.utils import soft, mw_map_weights, _multires_bandlimits
+from pxmcmc.utils import soft, mw_map_weights, _multires_bandlimits, _wavelet_tiling
 
 
 class L1:
@@ -32,7 +32,7 @@ class L1:
         :param X: MCMC sample
         :return: log prior
         """
-        return sum(abs(X))
+        return np.sum(np.abs(X))
 
     def proxf(self, X):
         """
@@ -75,7 +75,13 @@ class S2_Wavelets_L1(L1):
         self.spin = spin
         if setting == "synthesis":
             bls = _multires_bandlimits(L, B, J_min, dirs, spin)
-            self.map_weights = np.concatenate([mw_map_weights(el) for el in bls])
+            scale_lengths = [pyssht.sample_length(el) for el in bls]
+            self.map_weights = np.empty(sum(scale_lengths))
+            scale_start = 0
+            for el, scale_length in zip(bls, scale_lengths):
+                scale_end = scale_start + scale_length
+                self.map_weights[scale_start:scale_end] = mw_map_weights(el)
+                scale_start = scale_end
         else:
             raise NotImplementedError
         self.T *= self.map_weights
@@ -111,39 +117,45 @@ class S2_Wavelets_L1_Power_Weights(S2_Wavelets_L1):
         return super().prior(self.map_weights * X)
 
     def _get_weights(self):
-        scaling_weights = self._calculate_scaling_weights()
-        s = scaling_weights.flatten()
-        wavelet_weights = self._calculate_wavelet_weights()
-        w = np.concatenate([w.flatten() for w in wavelet_weights])
-        self.map_weights = np.concatenate([s, w])
-
-    def _calculate_scaling_weights(self):
-        phi_l, _ = pys2let.wavelet_tiling(self.B, self.L, self.dirs, self.J_min, self.spin)
+        bls = _multires_bandlimits(self.L, self.B, self.J_min)
+        scale_lengths = [pyssht.sample_length(el) for el in bls]
+        self.map_weights = np.empty(sum(scale_lengths))
+        # views into map_weights, one per scale, filled in place
+        scales = np.split(self.map_weights, np.cumsum(scale_lengths)[:-1])
+        self._calculate_scaling_weights(scales[0])
+        self._calculate_wavelet_weights(bls[1:], scales[1:])
+
+    def _calculate_scaling_weights(self, out):
+        phi_l, _ = _wavelet_tiling(self.B, self.L, self.dirs, self.J_min, self.spin)
         scaling_power = np.vdot(phi_l, phi_l).real
         effective_L = np.nonzero(phi_l)[0].max() + 1
         nsamples = pyssht.sample_length(effective_L)
-        weights = np.full(pyssht.sample_shape(effective_L), 2 * np.pi ** 2 / (scaling_power * nsamples))
-        thetas, _ = pyssht.sample_positions(effective_L)
-        weights = (weights.T * np.sin(thetas)).T
-        return weights
+        self._fill_sin_weights(
+            out, effective_L, 2 * np.pi ** 2 / (scaling_power * nsamples)
+        )
 
-    def _calculate_wavelet_weights(self):
-        bls = _multires_bandlimits(self.L, self.B, self.J_min)
-        _, psi_lm = pys2let.wavelet_tiling(self.B, self.L, self.dirs, self.J_min, self.spin)
+    def _calculate_wavelet_weights(self, bls, outs):
+        _, psi_lm = _wavelet_tiling(self.B, self.L, self.dirs, self.J_min, self.spin)
         wavelet_powers = np.array(
             [np.vdot(lm, lm).real for lm in psi_lm.T]
         )
-        psi_l = np.zeros((psi_lm.shape[1], self.L), dtype=complex)
-        for j, psi in enumerate(psi_lm.T):
-            psi_l[j, :] = np.array([psi[el ** 2 + el] for el in range(self.L)])
-        peak_ls = np.array(
-            [np.argmax(l) for l in psi_l]
-        )
-        all_weights = []
-        for effective_L, power, peak_l in zip(bls[1:], wavelet_powers, peak_ls):
+        els = np.arange(self.L)
+        psi_l = psi_lm[els ** 2 + els].T
+        peak_ls = np.argmax(psi_l, axis=1)
+        for effective_L, power, peak_l, out in zip(bls, wavelet_powers, peak_ls, outs):
             nsamples = pyssht.sample_length(effective_L)
-            weights = np.full(pyssht.sample_shape(effective_L), (2 * np.pi ** 2) * (peak_l ** self.eta) / (power * nsamples))
-            thetas, _ = pyssht.sample_positions(effective_L)
-            weights = (weights.T * np.sin(thetas)).T
-            all_weights.append(weights)
-        return np.array(all_weights, dtype=list)
+            self._fill_sin_weights(
+                out,
+                effective_L,
+                (2 * np.pi ** 2) * (peak_l ** self.eta) / (power * nsamples),
+            )
+
+    @staticmethod
+    def _fill_sin_weights(out, effective_L, value):
+        """
+        Writes :code:`value` weighted by :math:`\\sin\\theta` into the flattened MW map :code:`out`.
+        """
+        thetas, _ = pyssht.sample_positions(effective_L)
+        out.reshape(pyssht.sample_shape(effective_L))[...] = (
+            value * np.sin(thetas)[:, np.newaxis]
+        )
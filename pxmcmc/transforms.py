@@ -106,9 +106,7 @@ class SphericalWaveletTransform(Transform):
         :param X: spherical image as a 1D array
         :return: 1D array of spherical wavelet coefficients
         """
-        if not isinstance(X, complex):
-            X = X.astype(complex)
-        X_wav, X_scal = self.fwd(X, **self.params)
+        X_wav, X_scal = self.fwd(np.asarray(X, dtype=np.complex128), **self.params)
         return flatten_mlm(X_wav, X_scal)
 
     def inverse(self, X):
@@ -118,11 +116,9 @@ class SphericalWaveletTransform(Transform):
         :param X: 1D array of spherical wavelet coefficients
         :return: spherical image as a 1D array
         """
-        wav, scal = expand_mlm(X, nscalcoefs=self.nscal)
-        if not isinstance(scal, complex):
-            scal = scal.astype(complex)
-        if not isinstance(scal, complex):
-            wav = wav.astype(complex)
+        wav, scal = expand_mlm(
+            np.asarray(X, dtype=np.complex128), nscalcoefs=self.nscal
+        )
         X = self.inv(wav, scal, **self.params)
         return X
 
@@ -133,9 +129,9 @@ class SphericalWaveletTransform(Transform):
         :param X: spherical image as a 1D array
         :return: 1D array of spherical wavelet coefficients
         """
-        if not isinstance(X, complex):
-            X = X.astype(complex)
-        X_wav, X_scal = self.inv_adj(X, **self.params)
+        X_wav, X_scal = self.inv_adj(
+            np.asarray(X, dtype=np.complex128), **self.params
+        )
         return flatten_mlm(X_wav, X_scal)
 
     def forward_adjoint(self, X):
@@ -145,11 +141,9 @@ class SphericalWaveletTransform(Transform):
         :param X: 1D array of spherical wavelet coefficients
         :return: spherical image as a 1D array
         """
-        wav, scal = expand_mlm(X, nscalcoefs=self.nscal)
-        if not isinstance(scal, complex):
-            scal = scal.astype(complex)
-        if not isinstance(scal, complex):
-            wav = wav.astype(complex)
+        wav, scal = expand_mlm(
+            np.asarray(X, dtype=np.complex128), nscalcoefs=self.nscal
+        )
         X = self.fwd_adj(wav, scal, **self.params)
         return X
 
@@ -160,7 +154,7 @@ class SphericalWaveletTransform(Transform):
 
         TODO: CHECK THIS FOR HARMONIC
         """
-        f_mw = np.empty(pyssht.sample_length(self.L), dtype=complex)
+        f_mw = np.empty(pyssht.sample_length(self.L), dtype=np.complex128)
         f_wav, f_scal = pys2let.analysis_px2wav(f_mw, **self.params)
         self.nwav, self.nscal = (f_wav.shape[0], f_scal.shape[0])
         self.ncoefs = self.nwav + self.nscal
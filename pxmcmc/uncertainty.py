@@ -28,16 +28,12 @@ def wavelet_credible_interval_range(chain, L, B, J_min, alpha=0.05):
     :return: array of credible interval ranges for each wavelet coefficient
     """
     bls = _multires_bandlimits(L, B, J_min)
-    scale_start = 0
-    wav_ci_ranges = []
-    for i, bl in enumerate(bls):
-        scale_length = pyssht.sample_length(bl)
-        wav = chain[:, scale_start : scale_start + scale_length]
-        wav_ci_ranges.append(
-            credible_interval_range(wav, alpha).reshape(pyssht.sample_shape(bl))
-        )
-        scale_start += scale_length
-    return wav_ci_ranges
+    scale_ends = np.cumsum([pyssht.sample_length(bl) for bl in bls])
+    ci_ranges = credible_interval_range(chain[:, : scale_ends[-1]], alpha)
+    return [
+        ci_range.reshape(pyssht.sample_shape(bl))
+        for ci_range, bl in zip(np.split(ci_ranges, scale_ends[:-1]), bls)
+    ]
 
 
 def credible_region_threshold(logpis, alpha=0.05):
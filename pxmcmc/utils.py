@@ -1,12 +1,18 @@
 import numpy as np
 import healpy as hp
 from contextlib import contextmanager
+from functools import lru_cache
 import os
 import sys
 import pys2let
 import pyssht
 from astropy.coordinates import SkyCoord
 
+try:
+    from pxmcmc import _kernels
+except ImportError:
+    _kernels = None
+
 
 def flatten_mlm(wav_lm, scal_lm):
     """
@@ -17,8 +23,11 @@ def flatten_mlm(wav_lm, scal_lm):
 
     :return: 1D array of coefficients, with the scaling coefficients first
     """
-    buff = wav_lm.ravel(order="F")
-    mlm = np.concatenate((scal_lm, buff))
+    wav_lm, scal_lm = np.asarray(wav_lm), np.asarray(scal_lm)
+    mlm = np.empty(scal_lm.size + wav_lm.size, dtype=np.result_type(wav_lm, scal_lm))
+    mlm[: scal_lm.size] = scal_lm
+    # Fortran-ordered view of the tail, so the wavelets are copied in exactly once
+    mlm[scal_lm.size :].reshape(wav_lm.shape, order="F")[...] = wav_lm
     return mlm
 
 
@@ -31,7 +40,7 @@ def expand_mlm(mlm, nscales=None, nscalcoefs=None, flatten_wavs=False):
     :param int nscalcoefs: number of scaling function coefficients.  Use only if coefficients follow the multiresolution algorithm, otherwise leave as :code:`None`
     :param bool flatten_wavs: flattens the wavelet coefficients into a 1D array, otherwise 2D.  Ignored if :code:`nscalcoefs` is not :code:`None`.
 
-    :return: tuple (wavelet coefficients, scaling coefficients)
+    :return: tuple (wavelet coefficients, scaling coefficients).  Both are views into :code:`mlm`, so no data is copied.
     """
     if nscales is None and nscalcoefs is None:
         raise ValueError("Set either 'nscales', or 'nscalcoefs'")
@@ -41,88 +50,172 @@ def expand_mlm(mlm, nscales=None, nscalcoefs=None, flatten_wavs=False):
         v_len = mlm.size // (nscales + 1)
         assert v_len > 0
         scal_lm = mlm[:v_len]
-        wav_lm = np.zeros((v_len, nscales), dtype=complex)
-        for i in range(nscales):
-            wav_lm[:, i] = mlm[(i + 1) * v_len : (i + 2) * v_len]
-        if flatten_wavs:
-            wav_lm = np.concatenate([wav_lm[:, i] for i in range(nscales)])
+        wav_lm = mlm[v_len : (nscales + 1) * v_len]
+        if not flatten_wavs:
+            wav_lm = wav_lm.reshape((nscales, v_len)).T
     elif nscalcoefs is not None:
         scal_lm = mlm[:nscalcoefs]
         wav_lm = mlm[nscalcoefs:]
     return wav_lm, scal_lm
 
 
-def soft(X, T=0.1):
+def soft(X, T=0.1, out=None):
     """
     Soft thresholding of a vector X with threshold T.  If :math:`X_i < T`, then :math:`\mathrm{soft}(X_i) = 0`, otherwise :math:`\mathrm{soft}(X_i) = X_i-T`.
 
     :param X: vector of values to threshold
     :param float T: threshold.  Can be a vector of same size as :code:`X`
+    :param out: optional array to write the result into, e.g. :code:`X` itself to threshold in place.  Must be complex if :code:`X` is complex.  If not given, a new array is returned and :code:`X` is not modified.
     
     :return: thresholded vector
+
+    .. note::
+       If `numba <https://numba.pydata.org/>`_ is installed, :code:`X` is double precision and :code:`T` is a vector, a compiled single-pass kernel is used.
     """
-    X = np.array(X)
-    t = _sign(X) * (np.abs(X) - T)
-    t[np.abs(X) <= T] = 0
-    return t
+    X = np.asarray(X)
+    if (
+        _kernels is not None
+        and X.ndim == 1
+        and np.shape(T) == X.shape
+        and X.dtype in (np.float64, np.complex128)
+        and np.result_type(T, float) == np.float64
+    ):
+        return _soft_compiled(X, np.asarray(T, dtype=float), out)
+    absX = np.abs(X)
+    sign = _sign(X, absX)
+    # promote integers to float as X / |X| would, but keep single precision
+    shrunk = np.subtract(absX, T, dtype=np.result_type(absX, T, 1.0))
+    np.maximum(shrunk, 0, out=shrunk)
+    return np.multiply(sign, shrunk, out=out)
+
+
+def _soft_compiled(X, T, out=None):
+    if out is None:
+        out = np.empty_like(X)
+    if np.iscomplexobj(X):
+        _kernels.soft_complex(X, np.abs(X), T, out)
+    else:
+        _kernels.soft_real(X, T, out)
+    return out
 
 
-def hard(X, T=0.1):
+def hard(X, T=0.1, out=None):
     """
     Hard thresholding of a vector X with fraction threshold T. T is the fraction kept, i.e. the largest 100T% absolute values are kept, the others are thresholded to 0.
     TODO: What happens when all elements of X are equal?
 
+    Writes into :code:`out` if given (which may be :code:`X` itself), otherwise returns a new array and :code:`X` is not modified.
+
+    :meta private:
+    """
+    X = np.asarray(X)
+    absX = np.abs(X)
+    thresh_ind = int(T * X.size)
+    # only the threshold value is needed, so select it rather than sort
+    thresh_val = np.partition(absX, -thresh_ind)[-thresh_ind]
+    if out is None:
+        out = np.empty_like(X)
+    np.copyto(out, X)
+    np.copyto(out, 0, where=absX < thresh_val)
+    return out
+
+
+def _sign(z, absz=None):
+    """
+    Sign of a real or complex array, i.e. :math:`z/|z|`, with 0 where :math:`z=0`.  Pass :code:`absz` if :math:`|z|` has already been computed.
+
     :meta private:
     """
-    X_srt = np.sort(abs(X))
-    thresh_ind = int(T * len(X))
-    thresh_val = X_srt[-thresh_ind]
-    X[abs(X) < thresh_val] = 0
-    return X
+    if not np.iscomplexobj(z):
+        return np.sign(z)
+    if absz is None:
+        absz = np.abs(z)
+    return np.divide(z, absz, out=np.zeros_like(z), where=absz != 0)
+
 
+@lru_cache(maxsize=None)
+def _devnull():
+    """
+    Single handle on :code:`os.devnull`, opened on first use and kept open.
 
-def _sign(z):
-    abs = np.abs(z)
-    z[abs == 0] = 0
-    abs[abs == 0] = 1
-    return z / abs
+    :meta private:
+    """
+    return open(os.devnull, "w")
 
 
 @contextmanager
 def suppress_stdout():
     """
-    Suppresses stdout from some healpy functions
+    Suppresses stdout from some healpy functions.
+    Both :code:`sys.stdout` and file descriptor 1 are pointed at :code:`os.devnull`, so output written from compiled code is silenced too, even if :code:`sys.stdout` has been replaced.
     :meta private:
     """
-    with open(os.devnull, "w") as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
+    devnull = _devnull()
+    old_stdout = sys.stdout
+    if old_stdout is not None:
+        old_stdout.flush()
+    # compiled code writes to fd 1 whatever sys.stdout happens to be
+    saved_fd = os.dup(1)
+    os.dup2(devnull.fileno(), 1)
+    sys.stdout = devnull
+    try:
+        yield
+    finally:
+        sys.stdout = old_stdout
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
 
 
 def map2alm(image, lmax, **kwargs):
-    with suppress_stdout():
-        return hp.map2alm(image, lmax, **kwargs)
+    return hp.map2alm(image, lmax, **kwargs)
 
 
 def alm2map(alm, nside, **kwargs):
-    with suppress_stdout():
-        return hp.alm2map(alm, nside, **kwargs)
+    return hp.alm2map(alm, nside, **kwargs)
 
 
-def _multires_bandlimits(L, B, J_min, dirs=1, spin=0):
+@lru_cache(maxsize=16)
+def _wavelet_tiling(B, L, dirs, J_min, spin):
+    """
+    Cached :code:`pys2let.wavelet_tiling`.  The returned arrays are shared between callers so are made read-only.
+
+    :meta private:
+    """
     phi_l, psi_lm = pys2let.wavelet_tiling(B, L, dirs, J_min, spin)
-    psi_l = np.zeros((psi_lm.shape[1], L), dtype=complex)
-    for j, psi in enumerate(psi_lm.T):
-        psi_l[j, :] = np.array([psi[el ** 2 + el] for el in range(L)])
+    phi_l.setflags(write=False)
+    psi_lm.setflags(write=False)
+    return phi_l, psi_lm
+
+
+@lru_cache(maxsize=16)
+def _multires_bandlimits(L, B, J_min, dirs=1, spin=0):
+    """
+    Bandlimits of the scaling function and each wavelet scale, as used by the multiresolution algorithm.  Cached, so the returned array is read-only.
+
+    :meta private:
+    """
+    phi_l, psi_lm = _wavelet_tiling(B, L, dirs, J_min, spin)
+    els = np.arange(L)
+    psi_l = psi_lm[els ** 2 + els].T
     gamma_l = np.vstack([phi_l, psi_l])
-    bandlimits = np.zeros(gamma_l.shape[0], dtype=int)
-    for j, gamma in enumerate(gamma_l):
-        bandlimits[j] = np.nonzero(gamma)[0].max() + 1
-    return bandlimits
+    # bandlimit is one more than the index of the last non-zero harmonic
+    last_nonzero = np.argmax(gamma_l[:, ::-1] != 0, axis=1)
+    bls = gamma_l.shape[1] - last_nonzero
+    bls.setflags(write=False)
+    return bls
+
+
+# T_0 to T_7 in Horner form in X^2, so low orders skip the recurrence
+_CHEB1_CLOSED_FORMS = (
+    lambda X: 1,
+    lambda X: X,
+    lambda X: 2 * X * X - 1,
+    lambda X: (4 * X * X - 3) * X,
+    lambda X: (8 * X * X - 8) * X * X + 1,
+    lambda X: ((16 * X * X - 20) * X * X + 5) * X,
+    lambda X: ((32 * X * X - 48) * X * X + 18) * X * X - 1,
+    lambda X: (((64 * X * X - 112) * X * X + 56) * X * X - 7) * X,
+)
 
 
 def chebyshev1(X, order):
@@ -136,6 +229,8 @@ def chebyshev1(X, order):
 
     :math:`T_{0}(X) = 1`
 
+    Orders up to 7 are evaluated directly from their closed forms.
+
     :param X: point at which to calulate :math:`T_{k+1}`
     :param int order: polynomial order
 
@@ -143,12 +238,38 @@ def chebyshev1(X, order):
     """
     if order < 0:
         raise ValueError("order must be >= 0")
-    elif order == 0:
-        return 1
-    elif order == 1:
-        return X
-    else:
-        return 2 * X * chebyshev1(X, order - 1) - chebyshev1(X, order - 2)
+    elif order < len(_CHEB1_CLOSED_FORMS):
+        return _CHEB1_CLOSED_FORMS[order](X)
+    T_prev, T = 1, X
+    for _ in range(order - 1):
+        T_prev, T = T, 2 * X * T - T_prev
+    return T
+
+
+def chebyshev1_all(X, N):
+    """
+    Calculates the Chebyshev polynomials of the first kind of all orders up to :code:`N` at point(s) X, using a single pass of the recurrence in :meth:`chebyshev1`.
+    Use this rather than calling :meth:`chebyshev1` once per order.
+
+    :param X: point(s) at which to calulate :math:`T_{0}, \dots, T_{N}`
+    :param int N: highest polynomial order
+
+    :return: array of shape :code:`X.shape + (N+1,)` whose last axis indexes the order
+    """
+    if N < 0:
+        raise ValueError("N must be >= 0")
+    X = np.asarray(X)
+    x = X.reshape(-1)
+    # Fortran order, so each order is a contiguous column
+    out = np.empty((x.size, N + 1), dtype=np.result_type(X, float), order="F")
+    out[:, 0] = 1
+    if N > 0:
+        out[:, 1] = x
+    two_x = 2 * x
+    for k in range(1, N):
+        np.multiply(two_x, out[:, k], out=out[:, k + 1])
+        out[:, k + 1] -= out[:, k - 1]
+    return out.reshape(X.shape + (N + 1,))
 
 
 def chebyshev2(X, order):
@@ -171,10 +292,19 @@ def chebyshev2(X, order):
         raise ValueError("order must be >= 0")
     elif order == 0:
         return 1
-    elif order == 1:
-        return 2 * X
-    else:
-        return 2 * X * chebyshev2(X, order - 1) - chebyshev2(X, order - 2)
+    U_prev, U = 1, 2 * X
+    for _ in range(order - 1):
+        U_prev, U = U, 2 * X * U - U_prev
+    return U
+
+
+# dT_n/dX = nU_{n-1} for n <= 3, written out
+_CHEB1DER_CLOSED_FORMS = (
+    lambda X: 0,
+    lambda X: 1,
+    lambda X: 4 * X,
+    lambda X: 3 * (4 * X * X - 1),
+)
 
 
 def cheb1der(X, order):
@@ -191,12 +321,66 @@ def cheb1der(X, order):
     """
     if order < 0:
         raise ValueError("order must be > 0")
-    elif order == 0:
-        return 0
+    elif order < len(_CHEB1DER_CLOSED_FORMS):
+        return _CHEB1DER_CLOSED_FORMS[order](X)
     else:
         return order * chebyshev2(X, order - 1)
 
 
+def clenshaw(c, X):
+    """
+    Evaluates the Chebyshev series :math:`\sum_{k=0}^{N} c_kT_k(X)` using Clenshaw's recurrence
+
+    :math:`b_k = 2Xb_{k+1} - b_{k+2} + c_k`
+
+    :math:`\sum_{k=0}^{N} c_kT_k(X) = c_0 + Xb_1 - b_2`
+
+    This takes a single pass over the coefficients and is numerically stable, so should be used instead of :code:`sum(c[k] * chebyshev1(X, k) for k in range(len(c)))`.
+
+    :param c: 1D array of series coefficients, starting from :math:`c_0`
+    :param X: point(s) at which to evaluate the series
+
+    :return: value of the Chebyshev series at :code:`X`
+
+    .. note::
+       If `numba <https://numba.pydata.org/>`_ is installed and :code:`c` and :code:`X` are real with :code:`X` a vector, a compiled kernel is used.
+    """
+    c = np.asarray(c)
+    if c.ndim != 1 or c.size == 0:
+        raise ValueError("c must be a non-empty 1D array of coefficients")
+    X = np.asarray(X)
+    if (
+        _kernels is not None
+        and X.ndim == 1
+        and not np.iscomplexobj(X)
+        and not np.iscomplexobj(c)
+    ):
+        out = np.empty(X.shape, dtype=float)
+        _kernels.clenshaw(c.astype(float), X.astype(float), out)
+        return out
+    dtype = np.result_type(X, c, float)
+    two_x = 2 * X
+    b1 = np.zeros(X.shape, dtype=dtype)
+    b2 = np.zeros(X.shape, dtype=dtype)
+    tmp = np.empty(X.shape, dtype=dtype)
+    coefs = c[:0:-1]
+    # unrolled by two: b_k overwrites b_{k+2}, then b_{k-1} overwrites b_{k+1},
+    # which leaves b1 and b2 in their original roles without swapping
+    for ck, ck_1 in zip(coefs[0::2], coefs[1::2]):
+        np.multiply(two_x, b1, out=tmp)
+        np.subtract(tmp, b2, out=b2)
+        b2 += ck
+        np.multiply(two_x, b2, out=tmp)
+        np.subtract(tmp, b1, out=b1)
+        b1 += ck_1
+    if coefs.size % 2:
+        np.multiply(two_x, b1, out=tmp)
+        np.subtract(tmp, b2, out=b2)
+        b2 += coefs[-1]
+        b1, b2 = b2, b1
+    return c[0] + X * b1 - b2
+
+
 def pixel_area(r, theta1, theta2, phi1, phi2):
     """
     Calculates area of a spherical rectangle.  Angles must be given in radians.
@@ -235,14 +419,12 @@ def calc_pixel_areas(L, r=1):
     """
     thetas, phis = pyssht.sample_positions(L)
     nthetas, nphis = thetas.shape[0], phis.shape[0]
-    areas = np.zeros((nthetas, nphis), dtype=float)
+    areas = np.empty((nthetas, nphis), dtype=float)
     phis = np.append(phis, [2 * np.pi])
     areas[0] = polar_cap_area(r, thetas[0]) / nphis
-    for t, theta1 in enumerate(thetas[:-1]):
-        theta2 = thetas[t + 1]
-        for p, phi1 in enumerate(phis[:-1]):
-            phi2 = phis[p + 1]
-            areas[t + 1][p] = pixel_area(r, theta1, theta2, phi1, phi2)
+    areas[1:] = pixel_area(
+        r, thetas[:-1, np.newaxis], thetas[1:, np.newaxis], phis[:-1], phis[1:]
+    )
     return areas
 
 
@@ -260,9 +442,14 @@ def mw_weights(m):
 
 
 def weights_theta(L):
-    wr = np.zeros(2 * L - 1, dtype=complex)
-    for i, m in enumerate(range(-(L - 1), L)):
-        wr[i] = mw_weights(m) * np.exp(-1j * m * np.pi / (2 * L - 1))
+    ms = np.arange(-(L - 1), L)
+    # vectorised mw_weights(m) over all m
+    w = np.zeros(2 * L - 1, dtype=complex)
+    even = ms % 2 == 0
+    w[even] = 2.0 / (1.0 - ms[even] * ms[even])
+    w[ms == 1] = 1j * np.pi / 2
+    w[ms == -1] = -1j * np.pi / 2
+    wr = w * np.exp(-1j * ms * np.pi / (2 * L - 1))
     wr = (np.fft.fft(np.fft.ifftshift(wr)) * 2 * np.pi / (2 * L - 1) ** 2).real
     return wr
 
@@ -277,9 +464,9 @@ def mw_map_weights(L):
     """
     wr = weights_theta(L)
     q = np.copy(wr[0:L])
-    for i, j in enumerate(range(2 * L - 2, L - 1, -1)):
-        q[i] = q[i] + wr[j]
-    Q = np.outer(q, np.ones(2 * L - 1)).flatten()
+    # fold the thetas beyond the south pole back onto the sampled ones
+    q[: L - 1] += wr[L:][::-1]
+    Q = np.repeat(q, 2 * L - 1)
     return Q
 
 
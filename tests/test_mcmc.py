@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from pytest_cases import parametrize_with_cases
 
 from pxmcmc.mcmc import MYULA, PxMALA, SKROCK, PxMCMCParams
@@ -57,4 +58,21 @@ def test_initial_sample(algo, simpledata):
 def test_initial_sample_failure(algo, simpledata):
     start_point = simpledata[:5]
     with pytest.raises(Exception):
-        algo.run(start_point)
\ No newline at end of file
+        algo.run(start_point)
+
+
+@pytest.mark.parametrize("iscomplex", [False, True])
+def test_single_precision_chain(forwardop, prox, iscomplex):
+    params = PxMCMCParams(
+        nsamples=10,
+        nburn=0,
+        ngap=1,
+        verbosity=0,
+        complex=iscomplex,
+        single_precision=True,
+        track=["logposterior", "L2", "prior", "chain", "predictions"],
+    )
+    algo = MYULA(forwardop, prox, params)
+    algo.run()
+    assert algo.chain.dtype == (np.complex64 if iscomplex else np.float32)
+    assert algo.preds.dtype == np.float32
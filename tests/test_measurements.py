@@ -1,8 +1,20 @@
 import numpy as np
+import pytest
 import pyssht
 from scipy import sparse
 
-from pxmcmc.measurements import PathIntegral, WeakLensingHarmonic, WeakLensing
+from pxmcmc.measurements import Identity, PathIntegral, WeakLensingHarmonic, WeakLensing
+
+
+@pytest.mark.parametrize("ndata,npix", [(100, 100), (50, 100), (100, 50)])
+def test_identity(ndata, npix):
+    identity = Identity(ndata, npix)
+    eye = sparse.eye(ndata, npix)
+
+    x = np.random.rand(npix)
+    y = np.random.rand(ndata)
+    assert np.allclose(identity.forward(x), eye.dot(x))
+    assert np.allclose(identity.adjoint(y), eye.T.dot(y))
 
 
 def test_pathintegral_dot(L):
@@ -45,6 +57,19 @@ def test_pathintegral_fwd_weights(L):
     assert np.isclose(pred, 2 * np.pi)
 
 
+@pytest.mark.parametrize("L", [1, 2, 3, 8, 17])
+def test_weaklensing_harmonic_kernel(L):
+    kernel = WeakLensingHarmonic(L).harmonic_kernel
+    expected = np.ones(L * L)
+    for el in range(2, L):
+        for m in range(-el, el + 1):
+            expected[pyssht.elm2ind(el, m)] = -np.sqrt(
+                (el + 2) * (el - 1) / ((el + 1) * el)
+            )
+    assert kernel.shape == (L * L,)
+    assert np.allclose(kernel, expected, rtol=1e-15, atol=0)
+
+
 def test_weaklensingharmonic_dot(L):
     operator = WeakLensingHarmonic(L)
 
@@ -1,5 +1,6 @@
 from pxmcmc import utils
 import numpy as np
+import os
 import pytest
 import pys2let
 import pyssht
@@ -21,6 +22,15 @@ def test_expandmlm():
     assert f_scal_lm.shape == (861,)
 
 
+def test_flatten_expand():
+    f_wav_lm = np.random.rand(861, 9)
+    f_scal_lm = np.random.rand(861)
+    mlm = utils.flatten_mlm(f_wav_lm, f_scal_lm)
+    f_wav_expanded, f_scal_expanded = utils.expand_mlm(mlm, nscales=9)
+    assert np.array_equal(f_wav_lm, f_wav_expanded)
+    assert np.array_equal(f_scal_lm, f_scal_expanded)
+
+
 def test_flatten_expand_multires(simpledata, L, B, J_min):
     f_mw = simpledata.astype(complex)
     f_wav, f_scal = pys2let.analysis_px2wav(f_mw, B, L, J_min, 1, 0, upsample=0)
@@ -44,6 +54,97 @@ def test_soft(ins, thresh, outs):
     assert all(utils.soft(ins, T=thresh) == outs)
 
 
+@pytest.mark.parametrize(
+    "dtype,expected",
+    [
+        (np.int64, np.float64),
+        (np.float32, np.float32),
+        (np.complex64, np.complex64),
+        (np.float64, np.float64),
+    ],
+)
+def test_soft_dtype(dtype, expected):
+    assert utils.soft(np.arange(5, dtype=dtype), T=1).dtype == expected
+
+
+def _use_compiled(compiled, monkeypatch):
+    if compiled:
+        pytest.importorskip("numba")
+    else:
+        monkeypatch.setattr(utils, "_kernels", None)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("T", [0.5, np.full(10, 0.5)])
+def test_soft_no_mutation(T, compiled, monkeypatch):
+    _use_compiled(compiled, monkeypatch)
+    X = np.linspace(-1, 1, 10)
+    X_copy = np.copy(X)
+    utils.soft(X, T=T)
+    assert np.array_equal(X, X_copy)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("iscomplex", [False, True])
+def test_soft_vector_threshold(iscomplex, compiled, monkeypatch):
+    _use_compiled(compiled, monkeypatch)
+    X = np.random.randn(100)
+    if iscomplex:
+        X = X + 1j * np.random.randn(100)
+    T = np.random.rand(100)
+    absX = np.abs(X)
+    expected = np.where(absX > T, X * (1 - T / absX), 0)
+    assert np.allclose(utils.soft(X, T=T), expected)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("iscomplex", [False, True])
+@pytest.mark.parametrize("T", [0.5, np.full(10, 0.5)])
+def test_soft_out(T, iscomplex, compiled, monkeypatch):
+    _use_compiled(compiled, monkeypatch)
+    X = np.linspace(-1, 1, 10) * (1 + 1j if iscomplex else 1)
+    expected = utils.soft(X, T=T)
+    out = np.empty_like(X)
+    assert utils.soft(X, T=T, out=out) is out
+    assert np.array_equal(out, expected)
+    utils.soft(X, T=T, out=X)
+    assert np.array_equal(X, expected)
+
+
+@pytest.mark.parametrize(
+    "dtype,Tdtype",
+    [
+        (np.float64, np.float64),
+        (np.complex128, np.float64),
+        (np.float32, np.float32),
+        (np.complex64, np.float32),
+        (np.int64, np.int64),
+    ],
+)
+def test_soft_compiled_matches_numpy(dtype, Tdtype, monkeypatch):
+    pytest.importorskip("numba")
+    X = np.random.randn(1000) * 3
+    if np.issubdtype(dtype, np.complexfloating):
+        X = X + 1j * np.random.randn(1000)
+    if np.issubdtype(dtype, np.inexact):
+        X[:3] = [np.nan, 0, np.inf]
+    X = X.astype(dtype)
+    T = (np.random.rand(1000) * 2).astype(Tdtype)
+    compiled = utils.soft(X, T=T)
+    monkeypatch.setattr(utils, "_kernels", None)
+    expected = utils.soft(X, T=T)
+    assert compiled.dtype == expected.dtype
+    assert np.array_equal(compiled, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_soft_nan(compiled, monkeypatch):
+    _use_compiled(compiled, monkeypatch)
+    X = np.array([np.nan, 1.0, -2.0, np.inf])
+    expected = [np.nan, 0.5, -1.5, np.inf]
+    assert np.array_equal(utils.soft(X, T=np.full(4, 0.5)), expected, equal_nan=True)
+
+
 @pytest.mark.parametrize(
     "ins,thresh,outs", [(np.arange(1, 11), 0.3, [0, 0, 0, 0, 0, 0, 0, 8, 9, 10])]
 )
@@ -51,6 +152,18 @@ def test_hard(ins, thresh, outs):
     assert all(utils.hard(ins, T=thresh) == outs)
 
 
+def test_hard_no_mutation():
+    X = np.random.randn(50)
+    X_copy = np.copy(X)
+    out = utils.hard(X, T=0.2)
+    assert np.array_equal(X, X_copy)
+    assert np.count_nonzero(out) == 10
+    assert np.array_equal(out[out != 0], X[np.abs(X) >= np.sort(np.abs(X))[-10]])
+    out_inplace = utils.hard(X, T=0.2, out=X)
+    assert out_inplace is X
+    assert np.array_equal(X, out)
+
+
 @pytest.mark.parametrize("order,X,expected", [(0, 5, 1), (1, 2, 2), (5, 3, 3363)])
 def test_chebyshev1(order, X, expected):
     assert utils.chebyshev1(X, order=order) == expected
@@ -61,11 +174,55 @@ def test_chebyshev2(order, X, expected):
     assert utils.chebyshev2(X, order=order) == expected
 
 
-@pytest.mark.parametrize("order,X,expected", [(0, 5, 0), (1, 2, 1), (5, 3, 5945)])
+@pytest.mark.parametrize("order", [2, 5, 7, 8, 10, 50])
+def test_chebyshev_trig_identity(order):
+    theta = np.linspace(0.1, 3, 20)
+    X = np.cos(theta)
+    assert np.allclose(utils.chebyshev1(X, order), np.cos(order * theta))
+    assert np.allclose(
+        utils.chebyshev2(X, order), np.sin((order + 1) * theta) / np.sin(theta)
+    )
+
+
+@pytest.mark.parametrize("X", [0.7, np.linspace(-1.5, 1.5, 7)])
+@pytest.mark.parametrize("N", [0, 1, 6])
+def test_chebyshev1_all(X, N):
+    T = utils.chebyshev1_all(X, N)
+    assert T.shape == np.shape(X) + (N + 1,)
+    for order in range(N + 1):
+        assert np.allclose(T[..., order], utils.chebyshev1(X, order))
+
+
+@pytest.mark.parametrize(
+    "order,X,expected", [(0, 5, 0), (1, 2, 1), (2, 3, 12), (3, 2, 45), (5, 3, 5945)]
+)
 def test_cheb1der(order, X, expected):
     assert utils.cheb1der(X, order=order) == expected
 
 
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("X", [0.3, np.linspace(-1, 1, 21)])
+@pytest.mark.parametrize("ncoefs", [1, 2, 11, 12])
+def test_clenshaw(X, ncoefs, compiled, monkeypatch):
+    _use_compiled(compiled, monkeypatch)
+    c = np.random.randn(ncoefs)
+    expected = sum(c[k] * utils.chebyshev1(X, k) for k in range(len(c)))
+    assert np.allclose(utils.clenshaw(c, X), expected)
+
+
+@pytest.mark.parametrize("ncoefs", [1, 2, 9, 12])
+def test_clenshaw_compiled_matches_numpy(ncoefs, monkeypatch):
+    pytest.importorskip("numba")
+    X = np.linspace(-1, 1, 1001)
+    X[:2] = [np.nan, np.inf]
+    c = np.random.randn(ncoefs)
+    compiled = utils.clenshaw(c, X)
+    monkeypatch.setattr(utils, "_kernels", None)
+    with np.errstate(invalid="ignore"):
+        expected = utils.clenshaw(c, X)
+    assert np.array_equal(compiled, expected, equal_nan=True)
+
+
 def test_pixel_area():
     area = utils.pixel_area(1, 0, np.pi, 0, 2 * np.pi)
     assert np.isclose(area, 4 * np.pi)
@@ -82,6 +239,21 @@ def test_calc_pixel_areas(L):
     assert np.isclose(np.sum(areas), 4 * np.pi)
 
 
+@pytest.mark.parametrize("L", [1, 2, 10, 33])
+def test_mw_map_weights(L):
+    wr = np.zeros(2 * L - 1, dtype=complex)
+    for i, m in enumerate(range(-(L - 1), L)):
+        wr[i] = utils.mw_weights(m) * np.exp(-1j * m * np.pi / (2 * L - 1))
+    wr = (np.fft.fft(np.fft.ifftshift(wr)) * 2 * np.pi / (2 * L - 1) ** 2).real
+    assert np.allclose(utils.weights_theta(L), wr, rtol=1e-14, atol=1e-17)
+
+    q = np.copy(wr[0:L])
+    for i, j in enumerate(range(2 * L - 2, L - 1, -1)):
+        q[i] = q[i] + wr[j]
+    Q = np.outer(q, np.ones(2 * L - 1)).flatten()
+    assert np.allclose(utils.mw_map_weights(L), Q, rtol=1e-14, atol=0)
+
+
 def test_s2_integrate(L):
 
     flm = np.zeros((L * L), dtype=complex)
@@ -98,3 +270,31 @@ def test_s2_integrate(L):
     f = pyssht.inverse(flm, L, Method="MW", Reality=True).flatten()
 
     assert np.isclose(I0, utils.s2_integrate(f, L))
+
+
+def test_wavelet_tiling_cached(L, B, J_min):
+    phi_l, psi_lm = utils._wavelet_tiling(B, L, 1, J_min, 0)
+    assert utils._wavelet_tiling(B, L, 1, J_min, 0)[0] is phi_l
+    assert not phi_l.flags.writeable
+    assert not psi_lm.flags.writeable
+
+
+def test_multires_bandlimits_cached(L, B, J_min):
+    bls = utils._multires_bandlimits(L, B, J_min)
+    assert utils._multires_bandlimits(L, B, J_min) is bls
+    assert not bls.flags.writeable
+
+
+def test_suppress_stdout(capsys):
+    with utils.suppress_stdout():
+        print("hidden")
+    print("shown")
+    assert capsys.readouterr().out == "shown\n"
+
+
+def test_suppress_stdout_fd(capfd):
+    with utils.suppress_stdout():
+        os.write(1, b"hidden\n")
+        print("hidden")
+    print("shown")
+    assert capfd.readouterr().out == "shown\n"